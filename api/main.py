@@ -3,19 +3,28 @@ Financial Analytics API Backend
 Enterprise-grade financial data models and API endpoints
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from starlette.background import BackgroundTask
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from typing import List, Dict, Any, Literal, Optional
+from functools import lru_cache
 from datetime import datetime, date, timedelta
 from enum import Enum
+from dateutil.relativedelta import relativedelta
 import pandas as pd
 import numpy as np
+import orjson
 import uvicorn
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Date
+from sqlalchemy import create_engine, event, select, Column, Integer, String, Float, DateTime, Date, Index, case, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 import logging
+import os
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,7 +34,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="ERP Financial Analytics API",
     description="Enterprise-grade financial analytics and reporting API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -39,11 +49,31 @@ app.add_middleware(
 
 # Database setup
 DATABASE_URL = "sqlite:///./financial_analytics.db"
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Relax fsyncs per connection, but only when the database is in WAL mode"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode")
+    if cursor.fetchone()[0] == "wal":
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+# Cache setup (disabled unless REDIS_URL is configured)
+REDIS_URL = os.getenv("REDIS_URL")
+KPI_CACHE_TTL_SECONDS = 60
+redis_client = Redis.from_url(REDIS_URL) if REDIS_URL else None
+
+
 # Enums
 class PeriodType(str, Enum):
     MONTHLY = "monthly"
@@ -51,16 +81,14 @@ class PeriodType(str, Enum):
     YEARLY = "yearly"
 
 
-class CompanyUnit(str, Enum):
-    CONSOLIDATED = "consolidated"
-    NORTH_AMERICA = "north_america"
-    EUROPE = "europe"
-    ASIA_PACIFIC = "asia_pacific"
+# Company units, validated as plain strings with no enum coercion
+CompanyUnitName = Literal["consolidated", "north_america", "europe", "asia_pacific"]
 
 
 # Database Models
 class FinancialPeriod(Base):
     __tablename__ = "financial_periods"
+    __table_args__ = (Index("ix_fp_unit_date", "company_unit", "period_date"),)
 
     id = Column(Integer, primary_key=True, index=True)
     period_date = Column(Date, nullable=False)
@@ -82,6 +110,7 @@ class FinancialPeriod(Base):
 
 class BudgetData(Base):
     __tablename__ = "budget_data"
+    __table_args__ = (Index("ix_bd_unit_date", "company_unit", "period_date"),)
 
     id = Column(Integer, primary_key=True, index=True)
     period_date = Column(Date, nullable=False)
@@ -94,6 +123,7 @@ class BudgetData(Base):
 
 class CashFlowData(Base):
     __tablename__ = "cash_flow_data"
+    __table_args__ = (Index("ix_cf_unit_date", "company_unit", "period_date"),)
 
     id = Column(Integer, primary_key=True, index=True)
     period_date = Column(Date, nullable=False)
@@ -110,8 +140,24 @@ class CashFlowData(Base):
 Base.metadata.create_all(bind=engine)
 
 
+def init_db():
+    """Idempotent database setup, run on API startup and before seeding rather than on import"""
+    with engine.connect() as conn:
+        # WAL is persistent, so pooled connections can read while another one writes
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        # This connection was opened before the switch, so set_sqlite_pragmas left it at FULL
+        conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+
+    # create_all skips tables that already exist, so add any indexes missing from older databases
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 # Pydantic Models
 class FinancialMetrics(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     period_date: date
     revenue: float
     cogs: float
@@ -128,6 +174,8 @@ class FinancialMetrics(BaseModel):
 
 
 class KPIResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
     total_revenue: float
     revenue_growth_pct: float
     total_profit: float
@@ -139,16 +187,68 @@ class KPIResponse(BaseModel):
     period_end: date
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
+# Cache helpers
+def kpi_cache_key(company_unit: str, period_months: int, today: date) -> str:
+    return f"kpis:{company_unit}:{period_months}:{today.isoformat()}"
+
+
+async def get_cached_kpis(key: str) -> Optional[KPIResponse]:
+    """Return cached KPIs, or None on a miss or when the cache is unavailable"""
+    if redis_client is None:
+        return None
     try:
-        yield db
-    finally:
-        db.close()
+        raw = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning(f"KPI cache read failed: {str(e)}")
+        return None
+    if not raw:
+        return None
+    try:
+        return KPIResponse.model_validate_json(raw)
+    except ValidationError as e:
+        # Stale or corrupt entry (e.g. written by an older KPIResponse); treat it as a miss
+        logger.warning(f"Discarding unreadable KPI cache entry {key} ({e.error_count()} validation errors)")
+        try:
+            await redis_client.delete(key)
+        except RedisError:
+            pass
+        return None
+
+
+async def set_cached_kpis(key: str, kpis: KPIResponse):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.setex(key, KPI_CACHE_TTL_SECONDS, kpis.model_dump_json())
+    except RedisError as e:
+        logger.warning(f"KPI cache write failed: {str(e)}")
+
+
+async def invalidate_kpi_cache():
+    """Drop this process's KPI memo and the shared Redis entries; call after any write
+    to the financial tables. Other processes' memos expire within KPI_CACHE_TTL_SECONDS."""
+    cached_kpis.cache_clear()
+    if redis_client is None:
+        return
+    try:
+        keys = [key async for key in redis_client.scan_iter(match="kpis:*")]
+        if keys:
+            await redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning(f"KPI cache invalidation failed: {str(e)}")
 
 
 # Data generation functions
+RNG = np.random.default_rng(42)  # Seeded once so sample data is reproducible
+
+
+def _rows_from_columns(**columns) -> List[Dict[str, Any]]:
+    """Transpose equal-length column arrays into insert-ready row dicts"""
+    names = list(columns)
+    values = [col.tolist() if isinstance(col, np.ndarray) else col for col in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
 def generate_sample_financial_data(db: Session):
     """Generate comprehensive sample financial data"""
 
@@ -165,107 +265,182 @@ def generate_sample_financial_data(db: Session):
     start_date = end_date - timedelta(days=730)
 
     # Create monthly periods
-    current_date = start_date.replace(day=1)
+    periods = pd.date_range(start_date.replace(day=1), end_date, freq="MS")
+    n_months = len(periods)
+    period_dates = periods.date.tolist()
     revenue_base = 50000000  # $50M annual revenue
 
-    while current_date <= end_date:
-        # Add seasonality and growth
-        month_factor = 1 + 0.1 * np.sin(2 * np.pi * current_date.month / 12)
-        months_since_start = (current_date.year - start_date.year) * 12 + (current_date.month - start_date.month)
-        growth_factor = 1 + (months_since_start * 0.005)  # 0.5% monthly growth
-        random_factor = np.random.normal(1, 0.08)
-
-        monthly_revenue = (revenue_base / 12) * month_factor * growth_factor * random_factor
-        monthly_revenue = max(monthly_revenue, 0)
-
-        # Calculate expenses
-        cogs = monthly_revenue * np.random.normal(0.35, 0.02)
-        salaries = monthly_revenue * np.random.normal(0.25, 0.01)
-        marketing = monthly_revenue * np.random.normal(0.08, 0.02)
-        rd = monthly_revenue * np.random.normal(0.12, 0.01)
-        operations = monthly_revenue * np.random.normal(0.06, 0.01)
-        other_expenses = monthly_revenue * np.random.normal(0.04, 0.01)
-
-        total_expenses = cogs + salaries + marketing + rd + operations + other_expenses
-        gross_profit = monthly_revenue - cogs
-        net_profit = monthly_revenue - total_expenses
-        gross_margin = (gross_profit / monthly_revenue) * 100
-        net_margin = (net_profit / monthly_revenue) * 100
-
-        # Save financial period
-        financial_period = FinancialPeriod(
-            period_date=current_date,
-            revenue=monthly_revenue,
-            cogs=cogs,
-            gross_profit=gross_profit,
-            salaries=salaries,
-            marketing=marketing,
-            rd_expense=rd,
-            operations=operations,
-            other_expenses=other_expenses,
-            total_expenses=total_expenses,
-            net_profit=net_profit,
-            gross_margin_pct=gross_margin,
-            net_margin_pct=net_margin
-        )
-        db.add(financial_period)
-
-        # Generate budget data (10% variance from actual)
-        budget_variance = np.random.normal(1.1, 0.05)
-        budget_data = BudgetData(
-            period_date=current_date,
-            budget_revenue=monthly_revenue * budget_variance,
-            budget_net_profit=net_profit * budget_variance,
-            budget_expenses=total_expenses * np.random.normal(0.95, 0.03)
-        )
-        db.add(budget_data)
-
-        # Generate cash flow data
-        operating_cf = net_profit + np.random.normal(500000, 100000)
-        investing_cf = np.random.normal(-200000, 50000)
-        financing_cf = np.random.normal(-100000, 200000)
-        net_cf = operating_cf + investing_cf + financing_cf
-
-        # Calculate cumulative cash balance
-        previous_balance = 10000000  # Starting balance
-        if current_date > start_date:
-            prev_cash = db.query(CashFlowData).filter(
-                CashFlowData.period_date < current_date
-            ).order_by(CashFlowData.period_date.desc()).first()
-            if prev_cash:
-                previous_balance = prev_cash.cash_balance
-
-        cash_balance = previous_balance + net_cf
-
-        cash_flow = CashFlowData(
-            period_date=current_date,
-            operating_cash_flow=operating_cf,
-            investing_cash_flow=investing_cf,
-            financing_cash_flow=financing_cf,
-            net_cash_flow=net_cf,
-            cash_balance=cash_balance
-        )
-        db.add(cash_flow)
-
-        # Move to next month
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
-
+    # Add seasonality and growth, computed for all months at once
+    month_factor = 1 + 0.1 * np.sin(2 * np.pi * periods.month.to_numpy() / 12)
+    growth_factor = 1 + np.arange(n_months) * 0.005  # 0.5% monthly growth
+    random_factor = RNG.normal(1, 0.08, n_months)
+
+    monthly_revenue = (revenue_base / 12) * month_factor * growth_factor * random_factor
+    monthly_revenue = np.maximum(monthly_revenue, 0)
+
+    # Calculate expenses
+    cogs = monthly_revenue * RNG.normal(0.35, 0.02, n_months)
+    salaries = monthly_revenue * RNG.normal(0.25, 0.01, n_months)
+    marketing = monthly_revenue * RNG.normal(0.08, 0.02, n_months)
+    rd = monthly_revenue * RNG.normal(0.12, 0.01, n_months)
+    operations = monthly_revenue * RNG.normal(0.06, 0.01, n_months)
+    other_expenses = monthly_revenue * RNG.normal(0.04, 0.01, n_months)
+
+    total_expenses = cogs + salaries + marketing + rd + operations + other_expenses
+    gross_profit = monthly_revenue - cogs
+    net_profit = monthly_revenue - total_expenses
+    gross_margin = (gross_profit / monthly_revenue) * 100
+    net_margin = (net_profit / monthly_revenue) * 100
+
+    # Generate budget data (10% variance from actual)
+    budget_variance = RNG.normal(1.1, 0.05, n_months)
+    budget_revenue = monthly_revenue * budget_variance
+    budget_net_profit = net_profit * budget_variance
+    budget_expenses = total_expenses * RNG.normal(0.95, 0.03, n_months)
+
+    # Generate cash flow data
+    operating_cf = net_profit + RNG.normal(500000, 100000, n_months)
+    investing_cf = RNG.normal(-200000, 50000, n_months)
+    financing_cf = RNG.normal(-100000, 200000, n_months)
+    net_cf = operating_cf + investing_cf + financing_cf
+
+    # Calculate cumulative cash balance from the $10M starting balance
+    cash_balance = 10000000 + np.cumsum(net_cf)
+
+    fin_rows = _rows_from_columns(
+        period_date=period_dates,
+        revenue=monthly_revenue,
+        cogs=cogs,
+        gross_profit=gross_profit,
+        salaries=salaries,
+        marketing=marketing,
+        rd_expense=rd,
+        operations=operations,
+        other_expenses=other_expenses,
+        total_expenses=total_expenses,
+        net_profit=net_profit,
+        gross_margin_pct=gross_margin,
+        net_margin_pct=net_margin
+    )
+    budget_rows = _rows_from_columns(
+        period_date=period_dates,
+        budget_revenue=budget_revenue,
+        budget_net_profit=budget_net_profit,
+        budget_expenses=budget_expenses
+    )
+    cash_rows = _rows_from_columns(
+        period_date=period_dates,
+        operating_cash_flow=operating_cf,
+        investing_cash_flow=investing_cf,
+        financing_cash_flow=financing_cf,
+        net_cash_flow=net_cf,
+        cash_balance=cash_balance
+    )
+
+    # Plain executemany per table, skipping the per-object unit-of-work flush
+    db.bulk_insert_mappings(FinancialPeriod, fin_rows)
+    db.bulk_insert_mappings(BudgetData, budget_rows)
+    db.bulk_insert_mappings(CashFlowData, cash_rows)
     db.commit()
     logger.info("Sample financial data generated successfully")
 
 
+# KPI calculations
+def compute_kpis(db: Session, period_months: int, company_unit: str, today: date) -> KPIResponse:
+    """Calculate KPIs for the window ending with the month containing `today`"""
+
+    # Current period as whole calendar months in [start_date, end_date),
+    # preceded by a previous period of the same length for comparison
+    end_date = today.replace(day=1) + relativedelta(months=1)
+    start_date = end_date - relativedelta(months=period_months)
+    prev_start = start_date - relativedelta(months=period_months)
+
+    in_current = FinancialPeriod.period_date >= start_date
+    in_previous = FinancialPeriod.period_date < start_date
+
+    # Latest cash balance, fetched in the same statement as the sums
+    latest_cash = select(CashFlowData.cash_balance).where(
+        CashFlowData.period_date < end_date,
+        CashFlowData.company_unit == company_unit
+    ).order_by(CashFlowData.period_date.desc()).limit(1).scalar_subquery()
+
+    # One index range scan over both periods; CASE without ELSE keeps the
+    # SUM NULL when a period has no rows
+    current_revenue, current_profit, prev_revenue, prev_profit, cash_balance = db.query(
+        func.sum(case((in_current, FinancialPeriod.revenue))),
+        func.sum(case((in_current, FinancialPeriod.net_profit))),
+        func.sum(case((in_previous, FinancialPeriod.revenue))),
+        func.sum(case((in_previous, FinancialPeriod.net_profit))),
+        latest_cash
+    ).filter(
+        FinancialPeriod.period_date >= prev_start,
+        FinancialPeriod.period_date < end_date,
+        FinancialPeriod.company_unit == company_unit
+    ).one()
+
+    if current_revenue is None:
+        raise HTTPException(status_code=404, detail="No financial data found for the specified period")
+
+    # Calculate current metrics
+    current_margin = (current_profit / current_revenue) * 100 if current_revenue > 0 else 0
+
+    # Calculate growth rates
+    revenue_growth = 0
+    profit_growth = 0
+    margin_change = 0
+
+    if prev_revenue is not None:
+        prev_margin = (prev_profit / prev_revenue) * 100 if prev_revenue > 0 else 0
+
+        revenue_growth = ((current_revenue - prev_revenue) / prev_revenue) * 100 if prev_revenue > 0 else 0
+        profit_growth = ((current_profit - prev_profit) / prev_profit) * 100 if prev_profit > 0 else 0
+        margin_change = current_margin - prev_margin
+
+    # Estimate cash position
+    cash_position = cash_balance if cash_balance is not None else current_revenue * 0.15
+
+    return KPIResponse(
+        total_revenue=current_revenue,
+        revenue_growth_pct=revenue_growth,
+        total_profit=current_profit,
+        profit_growth_pct=profit_growth,
+        net_margin_pct=current_margin,
+        margin_change_pp=margin_change,
+        cash_position=cash_position,
+        period_start=start_date,
+        period_end=end_date - timedelta(days=1)
+    )
+
+
+def kpi_memo_bucket() -> int:
+    """Current KPI_CACHE_TTL_SECONDS window, used to age out cached_kpis entries"""
+    return int(time.monotonic() // KPI_CACHE_TTL_SECONDS)
+
+
+@lru_cache(maxsize=64)
+def cached_kpis(period_months: int, company_unit: str, today: date, bucket: int) -> KPIResponse:
+    """Per-process KPI cache; `today` in the key expires entries at midnight and
+    `bucket` within KPI_CACHE_TTL_SECONDS, so a re-seed from another process shows up"""
+    db = SessionLocal()
+    try:
+        return compute_kpis(db, period_months, company_unit, today)
+    finally:
+        db.close()
+
+
 # API Endpoints
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database with sample data"""
+    """Bring the schema up to date, then seed sample data when SEED_ON_STARTUP=1 (otherwise run seed.py once)"""
+    init_db()
+    if os.getenv("SEED_ON_STARTUP") != "1":
+        return
     db = SessionLocal()
     try:
         generate_sample_financial_data(db)
     finally:
         db.close()
+    await invalidate_kpi_cache()
 
 
 @app.get("/")
@@ -282,74 +457,23 @@ async def health_check():
 @app.get("/financial/kpis", response_model=KPIResponse)
 async def get_financial_kpis(
         period_months: int = Query(12, ge=1, le=24, description="Number of months to analyze"),
-        company_unit: CompanyUnit = Query(CompanyUnit.CONSOLIDATED, description="Company unit to analyze"),
-        db: Session = Depends(get_db)
+        company_unit: CompanyUnitName = Query("consolidated", description="Company unit to analyze")
 ):
     """Get key financial performance indicators"""
 
+    today = date.today()
+    cache_key = kpi_cache_key(company_unit, period_months, today)
+    cached = await get_cached_kpis(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        # Get current period data
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=period_months * 30)
-
-        current_data = db.query(FinancialPeriod).filter(
-            FinancialPeriod.period_date >= start_date,
-            FinancialPeriod.period_date <= end_date,
-            FinancialPeriod.company_unit == company_unit.value
-        ).all()
-
-        # Get previous period for comparison
-        prev_start = start_date - timedelta(days=period_months * 30)
-        prev_end = start_date
-
-        previous_data = db.query(FinancialPeriod).filter(
-            FinancialPeriod.period_date >= prev_start,
-            FinancialPeriod.period_date < prev_end,
-            FinancialPeriod.company_unit == company_unit.value
-        ).all()
-
-        if not current_data:
-            raise HTTPException(status_code=404, detail="No financial data found for the specified period")
-
-        # Calculate current metrics
-        current_revenue = sum(p.revenue for p in current_data)
-        current_profit = sum(p.net_profit for p in current_data)
-        current_margin = (current_profit / current_revenue) * 100 if current_revenue > 0 else 0
-
-        # Calculate growth rates
-        revenue_growth = 0
-        profit_growth = 0
-        margin_change = 0
-
-        if previous_data:
-            prev_revenue = sum(p.revenue for p in previous_data)
-            prev_profit = sum(p.net_profit for p in previous_data)
-            prev_margin = (prev_profit / prev_revenue) * 100 if prev_revenue > 0 else 0
-
-            revenue_growth = ((current_revenue - prev_revenue) / prev_revenue) * 100 if prev_revenue > 0 else 0
-            profit_growth = ((current_profit - prev_profit) / prev_profit) * 100 if prev_profit > 0 else 0
-            margin_change = current_margin - prev_margin
-
-        # Estimate cash position
-        cash_data = db.query(CashFlowData).filter(
-            CashFlowData.period_date <= end_date,
-            CashFlowData.company_unit == company_unit.value
-        ).order_by(CashFlowData.period_date.desc()).first()
-
-        cash_position = cash_data.cash_balance if cash_data else current_revenue * 0.15
-
-        return KPIResponse(
-            total_revenue=current_revenue,
-            revenue_growth_pct=revenue_growth,
-            total_profit=current_profit,
-            profit_growth_pct=profit_growth,
-            net_margin_pct=current_margin,
-            margin_change_pp=margin_change,
-            cash_position=cash_position,
-            period_start=start_date,
-            period_end=end_date
-        )
+        kpis = cached_kpis(period_months, company_unit, today, kpi_memo_bucket())
+        await set_cached_kpis(cache_key, kpis)
+        return kpis
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error calculating KPIs: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error calculating KPIs: {str(e)}")
@@ -359,44 +483,50 @@ async def get_financial_kpis(
 async def get_financial_periods(
         start_date: Optional[date] = Query(None, description="Start date for analysis"),
         end_date: Optional[date] = Query(None, description="End date for analysis"),
-        company_unit: CompanyUnit = Query(CompanyUnit.CONSOLIDATED, description="Company unit"),
-        limit: int = Query(24, ge=1, le=100, description="Maximum number of periods to return"),
-        db: Session = Depends(get_db)
+        company_unit: CompanyUnitName = Query("consolidated", description="Company unit"),
+        limit: int = Query(24, ge=1, le=100, description="Maximum number of periods to return")
 ):
     """Get financial periods data"""
 
+    # The streamed body outlives the endpoint (and any yield dependency), so the
+    # response owns its session and closes it in a background task once it is done,
+    # even if the client disconnects before the first chunk
+    db = SessionLocal()
     try:
-        query = db.query(FinancialPeriod).filter(
-            FinancialPeriod.company_unit == company_unit.value
+        # Select only the response columns as plain rows, skipping ORM hydration
+        table = FinancialPeriod.__table__
+        stmt = select(*(table.c[name] for name in FinancialMetrics.model_fields)).where(
+            table.c.company_unit == company_unit
         )
 
         if start_date:
-            query = query.filter(FinancialPeriod.period_date >= start_date)
+            stmt = stmt.where(table.c.period_date >= start_date)
         if end_date:
-            query = query.filter(FinancialPeriod.period_date <= end_date)
-
-        periods = query.order_by(FinancialPeriod.period_date.desc()).limit(limit).all()
-
-        return [
-            FinancialMetrics(
-                period_date=p.period_date,
-                revenue=p.revenue,
-                cogs=p.cogs,
-                gross_profit=p.gross_profit,
-                salaries=p.salaries,
-                marketing=p.marketing,
-                rd_expense=p.rd_expense,
-                operations=p.operations,
-                other_expenses=p.other_expenses,
-                total_expenses=p.total_expenses,
-                net_profit=p.net_profit,
-                gross_margin_pct=p.gross_margin_pct,
-                net_margin_pct=p.net_margin_pct
-            )
-            for p in reversed(periods)  # Return in chronological order
-        ]
+            stmt = stmt.where(table.c.period_date <= end_date)
+
+        # Take the latest `limit` periods, then return them in chronological order
+        latest = stmt.order_by(table.c.period_date.desc()).limit(limit).subquery()
+        stmt = select(latest).order_by(latest.c.period_date.asc())
+        # Execute here so query errors still map to a 500
+        result = db.execute(stmt).yield_per(50)
+
+        def stream_rows():
+            try:
+                yield b"["
+                for i, row in enumerate(result.mappings()):
+                    if i:
+                        yield b","
+                    # Subquery column labels are str subclasses, which orjson only accepts with OPT_NON_STR_KEYS
+                    yield orjson.dumps(dict(row), option=orjson.OPT_NON_STR_KEYS)
+                yield b"]"
+            finally:
+                result.close()
+
+        # Rows already match FinancialMetrics, so skip response_model re-validation
+        return StreamingResponse(stream_rows(), media_type="application/json", background=BackgroundTask(db.close))
 
     except Exception as e:
+        db.close()
         logger.error(f"Error fetching financial periods: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
 
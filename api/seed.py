@@ -0,0 +1,25 @@
+"""
+Financial Analytics Seed Script
+Populates the database with sample financial data before the API starts.
+Re-seeding while the API runs shows up in /financial/kpis within KPI_CACHE_TTL_SECONDS.
+"""
+
+import asyncio
+
+from main import SessionLocal, generate_sample_financial_data, init_db, invalidate_kpi_cache
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        generate_sample_financial_data(db)
+    finally:
+        db.close()
+    # Clears Redis; a running API's in-process memo is not reachable from here and
+    # expires within KPI_CACHE_TTL_SECONDS (restart the API to see new data at once)
+    asyncio.run(invalidate_kpi_cache())
+
+
+if __name__ == "__main__":
+    main()
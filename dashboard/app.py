@@ -9,8 +9,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-from datetime import datetime, timedelta, date
-import calendar
+from datetime import datetime, date
 from typing import Dict, List, Any
 import json
 
@@ -23,7 +22,7 @@ st.set_page_config(
 )
 
 # Custom CSS for professional styling
-st.markdown("""
+CSS_BLOCK = """
 <style>
 .main-header {
     font-size: 2.5rem;
@@ -74,135 +73,211 @@ st.markdown("""
     margin-bottom: 1rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+# KPI card markup, filled per card with str.format_map
+_KPI_TMPL = """
+        <div class="metric-card">
+            <div class="metric-value">{prefix}{value:.1f}{unit}</div>
+            <div class="metric-label">{label}</div>
+            <div class="{color}">↗ {change:+.1f}{change_unit}</div>
+        </div>
+        """
+
+
+@st.cache_resource(show_spinner=False)
+def _inject_css():
+    """Emit the custom stylesheet; reruns replay the cached element"""
+    st.markdown(CSS_BLOCK, unsafe_allow_html=True)
+
 
+# Sample data parameters
+DATA_SEED = 42
+N_MONTHS = 24
 
-# Sample financial data generator
-@st.cache_data
-def generate_financial_data():
-    """Generate comprehensive sample financial data for demonstration"""
+# P&L columns totalled in one reduction per period
+SUM_COLUMNS = ['Revenue', 'COGS', 'Salaries', 'Marketing', 'R&D', 'Operations',
+               'Other_Expenses', 'Net_Profit', 'Total_Expenses', 'Gross_Profit']
 
-    # Date range for the last 24 months
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=730)
-    date_range = pd.date_range(start=start_date, end=end_date, freq='M')
+
+# Sample financial data generators, cached per frame so each is rebuilt only when its own inputs change
+@st.cache_data(show_spinner=False)
+def _pl_frame(seed: int, n_months: int) -> pd.DataFrame:
+    """Generate sample monthly P&L data for demonstration"""
+
+    # Month-end dates for the last `n_months` months
+    date_range = pd.date_range(end=datetime.now(), periods=n_months, freq='M')
 
     # Generate P&L data
-    np.random.seed(42)
+    rng = np.random.default_rng(seed)
 
     revenue_base = 50000000  # $50M annual revenue
-    monthly_revenue = []
-
-    for i, month in enumerate(date_range):
-        # Add seasonality and growth trend
-        seasonal_factor = 1 + 0.1 * np.sin(2 * np.pi * month.month / 12)
-        growth_factor = 1 + (i * 0.005)  # 0.5% monthly growth
-        random_factor = np.random.normal(1, 0.1)
-
-        monthly_rev = (revenue_base / 12) * seasonal_factor * growth_factor * random_factor
-        monthly_revenue.append(max(monthly_rev, 0))
-
-    # Generate expense categories
-    pl_data = []
-    for i, (month, revenue) in enumerate(zip(date_range, monthly_revenue)):
-        # Calculate expenses as percentages of revenue with some variance
-        cogs = revenue * np.random.normal(0.35, 0.02)  # 35% ± 2%
-        salaries = revenue * np.random.normal(0.25, 0.01)  # 25% ± 1%
-        marketing = revenue * np.random.normal(0.08, 0.02)  # 8% ± 2%
-        rd = revenue * np.random.normal(0.12, 0.01)  # 12% ± 1%
-        operations = revenue * np.random.normal(0.06, 0.01)  # 6% ± 1%
-        other_expenses = revenue * np.random.normal(0.04, 0.01)  # 4% ± 1%
-
-        total_expenses = cogs + salaries + marketing + rd + operations + other_expenses
-        gross_profit = revenue - cogs
-        net_profit = revenue - total_expenses
-
-        pl_data.append({
-            'Period': month,
-            'Year': month.year,
-            'Month': month.month,
-            'Month_Name': calendar.month_name[month.month],
-            'Quarter': f"Q{((month.month - 1) // 3) + 1}",
-            'Revenue': revenue,
-            'COGS': cogs,
-            'Gross_Profit': gross_profit,
-            'Salaries': salaries,
-            'Marketing': marketing,
-            'R&D': rd,
-            'Operations': operations,
-            'Other_Expenses': other_expenses,
-            'Total_Expenses': total_expenses,
-            'Net_Profit': net_profit,
-            'Gross_Margin_%': (gross_profit / revenue) * 100,
-            'Net_Margin_%': (net_profit / revenue) * 100,
-        })
-
-    df_pl = pd.DataFrame(pl_data)
+
+    # Add seasonality and growth trend
+    seasonal_factor = 1 + 0.1 * np.sin(2 * np.pi * date_range.month.values / 12)
+    growth_factor = 1 + 0.005 * np.arange(n_months)  # 0.5% monthly growth
+    random_factor = rng.normal(1, 0.1, n_months)
+
+    revenue = np.clip((revenue_base / 12) * seasonal_factor * growth_factor * random_factor, 0, None)
+
+    # Calculate expenses as percentages of revenue with some variance, one draw for all categories
+    # COGS 35% ± 2%, Salaries 25% ± 1%, Marketing 8% ± 2%, R&D 12% ± 1%, Operations 6% ± 1%, Other 4% ± 1%
+    expense_mus = np.array([0.35, 0.25, 0.08, 0.12, 0.06, 0.04])
+    expense_sigmas = np.array([0.02, 0.01, 0.02, 0.01, 0.01, 0.01])
+    expense_ratios = rng.normal(expense_mus, expense_sigmas, size=(n_months, len(expense_mus)))
+    cogs, salaries, marketing, rd, operations, other_expenses = (expense_ratios * revenue[:, None]).T
+
+    total_expenses = cogs + salaries + marketing + rd + operations + other_expenses
+    gross_profit = revenue - cogs
+    net_profit = revenue - total_expenses
+
+    amounts = {
+        'Revenue': revenue,
+        'COGS': cogs,
+        'Gross_Profit': gross_profit,
+        'Salaries': salaries,
+        'Marketing': marketing,
+        'R&D': rd,
+        'Operations': operations,
+        'Other_Expenses': other_expenses,
+        'Total_Expenses': total_expenses,
+        'Net_Profit': net_profit,
+        'Gross_Margin_%': (gross_profit / revenue) * 100,
+        'Net_Margin_%': (net_profit / revenue) * 100,
+    }
+
+    # Columns are already NumPy arrays; copy=False wraps them instead of copying into a consolidated block.
+    # Amounts are stored as float32, ample precision for $M reporting at half the cache size.
+    df_pl = pd.DataFrame({
+        'Period': date_range,
+        'Year': date_range.year.astype('int16'),
+        'Month': date_range.month.astype('int8'),
+        'Month_Name': date_range.month_name(),
+        'Quarter': 'Q' + date_range.quarter.astype(str),
+        **{name: values.astype(np.float32) for name, values in amounts.items()},
+    }, copy=False)
+
+    return df_pl
+
+
+@st.cache_data(show_spinner=False)
+def _budget_frame(seed: int, n_months: int, budget_seed: int) -> pd.DataFrame:
+    """Generate budget data for the P&L frame built from (seed, n_months)"""
+    df_pl = _pl_frame(seed, n_months)
+    rng = np.random.default_rng(budget_seed)
 
     # Generate budget data (10% higher than actual for demo)
     df_budget = df_pl.copy()
-    budget_variance = np.random.normal(1.1, 0.05, len(df_budget))
-    df_budget['Budget_Revenue'] = df_budget['Revenue'] * budget_variance
-    df_budget['Budget_Net_Profit'] = df_budget['Net_Profit'] * budget_variance
+    budget_variance = rng.normal(1.1, 0.05, len(df_budget))
+    df_budget['Budget_Revenue'] = (df_budget['Revenue'] * budget_variance).astype(np.float32)
+    df_budget['Budget_Net_Profit'] = (df_budget['Net_Profit'] * budget_variance).astype(np.float32)
+
+    return df_budget
+
+
+@st.cache_data(show_spinner=False)
+def _cash_flow_frame(seed: int, n_months: int, cash_seed: int) -> pd.DataFrame:
+    """Generate cash flow data for the P&L frame built from (seed, n_months)"""
+    df_pl = _pl_frame(seed, n_months)
+    rng = np.random.default_rng(cash_seed)
 
     # Generate cash flow data
-    cash_flow_data = []
-    cash_balance = 10000000  # Starting with $10M cash
+    n = len(df_pl)
+    operating_cash = df_pl['Net_Profit'].to_numpy() + rng.normal(500000, 100000, n)  # Add depreciation, etc.
+    investing_cash = rng.normal(-200000, 50000, n)  # CapEx
+    financing_cash = rng.normal(-100000, 200000, n)  # Debt/equity changes
+
+    net_cash_flow = operating_cash + investing_cash + financing_cash
+    cash_balance = 10000000 + np.cumsum(net_cash_flow)  # Starting with $10M cash
+
+    amounts = {
+        'Operating_Cash_Flow': operating_cash,
+        'Investing_Cash_Flow': investing_cash,
+        'Financing_Cash_Flow': financing_cash,
+        'Net_Cash_Flow': net_cash_flow,
+        'Cash_Balance': cash_balance
+    }
 
-    for _, row in df_pl.iterrows():
-        operating_cash = row['Net_Profit'] + np.random.normal(500000, 100000)  # Add depreciation, etc.
-        investing_cash = np.random.normal(-200000, 50000)  # CapEx
-        financing_cash = np.random.normal(-100000, 200000)  # Debt/equity changes
+    df_cash_flow = pd.DataFrame({
+        'Period': df_pl['Period'],
+        **{name: values.astype(np.float32) for name, values in amounts.items()},
+    }, copy=False)
 
-        net_cash_flow = operating_cash + investing_cash + financing_cash
-        cash_balance += net_cash_flow
+    return df_cash_flow
 
-        cash_flow_data.append({
-            'Period': row['Period'],
-            'Operating_Cash_Flow': operating_cash,
-            'Investing_Cash_Flow': investing_cash,
-            'Financing_Cash_Flow': financing_cash,
-            'Net_Cash_Flow': net_cash_flow,
-            'Cash_Balance': cash_balance
-        })
 
-    df_cash_flow = pd.DataFrame(cash_flow_data)
+def select_periods(df_pl, view_type):
+    """Split the P&L frame into current and comparison periods for the selected view"""
+    if view_type == "Last 12 Months":
+        df_current = df_pl.tail(12)
+        df_previous = df_pl.iloc[-24:-12] if len(df_pl) >= 24 else df_pl.head(12)
+    elif view_type == "Year-to-Date":
+        # Periods are sorted, so year boundaries are found by binary search and sliced positionally
+        current_year = datetime.now().year
+        prev_start, start, end = df_pl['Year'].to_numpy().searchsorted(
+            [current_year - 1, current_year, current_year + 1]
+        )
+        df_current = df_pl.iloc[start:end]
+        df_previous = df_pl.iloc[prev_start:start]
+    else:  # Last 24 months or custom
+        df_current = df_pl.tail(12)
+        df_previous = df_pl.iloc[-24:-12] if len(df_pl) >= 24 else df_pl.head(12)
 
-    return df_pl, df_budget, df_cash_flow
+    return df_current, df_previous
 
 
-def create_kpi_metrics(df_current, df_previous):
-    """Create KPI metrics with period-over-period comparison"""
+@st.cache_data(show_spinner=False)
+def compute_aggregates(seed: int, n_months: int, view_type: str) -> dict:
+    """Compute the period totals and averages shown across the dashboard tabs"""
+    df_current, df_previous = select_periods(_pl_frame(seed, n_months), view_type)
 
-    current_revenue = df_current['Revenue'].sum()
-    previous_revenue = df_previous['Revenue'].sum()
-    revenue_growth = ((current_revenue - previous_revenue) / previous_revenue) * 100
+    current_sums = df_current[SUM_COLUMNS].sum()
+    current_means = df_current[['Revenue', 'Gross_Margin_%', 'Net_Margin_%']].mean()
+    current_revenue = current_sums['Revenue']
 
-    current_profit = df_current['Net_Profit'].sum()
-    previous_profit = df_previous['Net_Profit'].sum()
-    profit_growth = ((current_profit - previous_profit) / previous_profit) * 100 if previous_profit != 0 else 0
+    return {
+        'current_sums': current_sums,
+        'previous_sums': df_previous[SUM_COLUMNS].sum(),
+        'avg_monthly_revenue': current_means['Revenue'],
+        'peak_month': df_current.loc[df_current['Revenue'].idxmax(), 'Month_Name'],
+        'avg_gross_margin': current_means['Gross_Margin_%'],
+        'avg_net_margin': current_means['Net_Margin_%'],
+        'cogs_pct': (current_sums['COGS'] / current_revenue) * 100,
+        'salaries_pct': (current_sums['Salaries'] / current_revenue) * 100,
+        'marketing_pct': (current_sums['Marketing'] / current_revenue) * 100,
+        'rd_pct': (current_sums['R&D'] / current_revenue) * 100,
+    }
 
-    current_margin = (df_current['Net_Profit'].sum() / df_current['Revenue'].sum()) * 100
-    previous_margin = (df_previous['Net_Profit'].sum() / df_previous['Revenue'].sum()) * 100
+
+def create_kpi_metrics(cur_rev: float, prev_rev: float, cur_profit: float, prev_profit: float) -> dict:
+    """Create KPI metrics with period-over-period comparison from period totals"""
+
+    revenue_growth = ((cur_rev - prev_rev) / prev_rev) * 100
+    profit_growth = ((cur_profit - prev_profit) / prev_profit) * 100 if prev_profit != 0 else 0
+
+    current_margin = (cur_profit / cur_rev) * 100
+    previous_margin = (prev_profit / prev_rev) * 100
     margin_change = current_margin - previous_margin
 
-    current_cash = df_current['Revenue'].sum() * 0.15  # Simplified cash calculation
+    current_cash = cur_rev * 0.15  # Simplified cash calculation
 
     return {
-        'revenue': {'value': current_revenue, 'growth': revenue_growth},
-        'profit': {'value': current_profit, 'growth': profit_growth},
+        'revenue': {'value': cur_rev, 'growth': revenue_growth},
+        'profit': {'value': cur_profit, 'growth': profit_growth},
         'margin': {'value': current_margin, 'change': margin_change},
         'cash': {'value': current_cash, 'growth': 5.2}  # Placeholder
     }
 
 
-def create_revenue_trend_chart(df):
+@st.cache_data(show_spinner=False)
+def create_revenue_trend_chart(df: pd.DataFrame) -> go.Figure:
     """Create revenue trend visualization"""
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     # Revenue trend
     fig.add_trace(
-        go.Scatter(
+        go.Scattergl(
             x=df['Period'],
             y=df['Revenue'],
             mode='lines+markers',
@@ -215,7 +290,7 @@ def create_revenue_trend_chart(df):
 
     # Net margin trend
     fig.add_trace(
-        go.Scatter(
+        go.Scattergl(
             x=df['Period'],
             y=df['Net_Margin_%'],
             mode='lines+markers',
@@ -226,12 +301,16 @@ def create_revenue_trend_chart(df):
         secondary_y=True
     )
 
-    # Add trend line
-    z = np.polyfit(range(len(df)), df['Revenue'], 1)
-    trend_line = np.poly1d(z)(range(len(df)))
+    # Add trend line (closed-form least-squares fit)
+    y = df['Revenue'].to_numpy()
+    x = np.arange(len(y), dtype=np.float64)
+    x_dev = x - x.mean()
+    slope = (x_dev @ (y - y.mean())) / (x_dev @ x_dev)
+    intercept = y.mean() - slope * x.mean()
+    trend_line = slope * x + intercept
 
     fig.add_trace(
-        go.Scatter(
+        go.Scattergl(
             x=df['Period'],
             y=trend_line,
             mode='lines',
@@ -256,17 +335,11 @@ def create_revenue_trend_chart(df):
     return fig
 
 
-def create_pl_waterfall_chart(df_current):
-    """Create P&L waterfall chart"""
-
-    total_revenue = df_current['Revenue'].sum()
-    total_cogs = df_current['COGS'].sum()
-    total_salaries = df_current['Salaries'].sum()
-    total_marketing = df_current['Marketing'].sum()
-    total_rd = df_current['R&D'].sum()
-    total_operations = df_current['Operations'].sum()
-    total_other = df_current['Other_Expenses'].sum()
-    net_profit = df_current['Net_Profit'].sum()
+@st.cache_data(show_spinner=False)
+def create_pl_waterfall_chart(total_revenue: float, total_cogs: float, total_salaries: float,
+                              total_marketing: float, total_rd: float, total_operations: float,
+                              total_other: float, net_profit: float) -> go.Figure:
+    """Create P&L waterfall chart from period totals"""
 
     fig = go.Figure(go.Waterfall(
         name="P&L Analysis",
@@ -294,13 +367,17 @@ def create_pl_waterfall_chart(df_current):
     return fig
 
 
-def create_budget_variance_chart(df_pl, df_budget):
+@st.cache_data(show_spinner=False)
+def create_budget_variance_chart(df_pl: pd.DataFrame, df_budget: pd.DataFrame) -> go.Figure:
     """Create budget vs actual variance analysis"""
 
     # Get last 12 months for comparison
     df_recent = df_pl.tail(12).copy()
     df_budget_recent = df_budget.tail(12).copy()
 
+    # Bars sit at integer positions; month names are sent once as axis tick labels
+    month_pos = np.arange(len(df_recent))
+
     fig = make_subplots(
         rows=2, cols=1,
         subplot_titles=('Revenue: Budget vs Actual', 'Profit: Budget vs Actual'),
@@ -310,7 +387,7 @@ def create_budget_variance_chart(df_pl, df_budget):
     # Revenue comparison
     fig.add_trace(
         go.Bar(
-            x=df_recent['Month_Name'],
+            x=month_pos,
             y=df_budget_recent['Budget_Revenue'],
             name='Budget Revenue',
             marker_color='lightblue',
@@ -321,7 +398,7 @@ def create_budget_variance_chart(df_pl, df_budget):
 
     fig.add_trace(
         go.Bar(
-            x=df_recent['Month_Name'],
+            x=month_pos,
             y=df_recent['Revenue'],
             name='Actual Revenue',
             marker_color='#3b82f6'
@@ -332,7 +409,7 @@ def create_budget_variance_chart(df_pl, df_budget):
     # Profit comparison
     fig.add_trace(
         go.Bar(
-            x=df_recent['Month_Name'],
+            x=month_pos,
             y=df_budget_recent['Budget_Net_Profit'],
             name='Budget Profit',
             marker_color='lightgreen',
@@ -344,7 +421,7 @@ def create_budget_variance_chart(df_pl, df_budget):
 
     fig.add_trace(
         go.Bar(
-            x=df_recent['Month_Name'],
+            x=month_pos,
             y=df_recent['Net_Profit'],
             name='Actual Profit',
             marker_color='#10b981',
@@ -358,11 +435,13 @@ def create_budget_variance_chart(df_pl, df_budget):
         height=600,
         barmode='group'
     )
+    fig.update_xaxes(tickmode='array', tickvals=month_pos, ticktext=df_recent['Month_Name'].tolist())
 
     return fig
 
 
-def create_cash_flow_chart(df_cash):
+@st.cache_data(show_spinner=False)
+def create_cash_flow_chart(df_cash: pd.DataFrame) -> go.Figure:
     """Create cash flow analysis chart"""
 
     fig = make_subplots(
@@ -404,7 +483,7 @@ def create_cash_flow_chart(df_cash):
 
     # Cash balance trend
     fig.add_trace(
-        go.Scatter(
+        go.Scattergl(
             x=df_cash['Period'],
             y=df_cash['Cash_Balance'],
             mode='lines+markers',
@@ -426,6 +505,8 @@ def create_cash_flow_chart(df_cash):
 
 
 def main():
+    _inject_css()
+
     # Header
     st.markdown('<h1 class="main-header">💰 ERP Financial Analytics Dashboard</h1>', unsafe_allow_html=True)
 
@@ -456,72 +537,52 @@ def main():
             st.cache_data.clear()
             st.rerun()
 
-    # Load data
+    # Load P&L data; budget and cash-flow frames are loaded only by the sections that use them
     with st.spinner("Loading financial data..."):
-        df_pl, df_budget, df_cash_flow = generate_financial_data()
+        df_pl = _pl_frame(DATA_SEED, N_MONTHS)
 
-    # Filter data based on selection
-    if view_type == "Last 12 Months":
-        df_current = df_pl.tail(12)
-        df_previous = df_pl.iloc[-24:-12] if len(df_pl) >= 24 else df_pl.head(12)
-    elif view_type == "Year-to-Date":
-        current_year = datetime.now().year
-        df_current = df_pl[df_pl['Year'] == current_year]
-        df_previous = df_pl[df_pl['Year'] == current_year - 1]
-    else:  # Last 24 months or custom
-        df_current = df_pl.tail(12)
-        df_previous = df_pl.iloc[-24:-12] if len(df_pl) >= 24 else df_pl.head(12)
+    # Period totals for the selected view
+    aggregates = compute_aggregates(DATA_SEED, N_MONTHS, view_type)
+    sums = aggregates['current_sums']
+    previous_sums = aggregates['previous_sums']
 
     # Calculate KPIs
-    kpis = create_kpi_metrics(df_current, df_previous)
+    kpis = create_kpi_metrics(
+        sums['Revenue'], previous_sums['Revenue'], sums['Net_Profit'], previous_sums['Net_Profit']
+    )
 
     # KPI Section
     st.markdown("## 📈 Key Performance Indicators")
     col1, col2, col3, col4 = st.columns(4)
 
-    with col1:
-        revenue_color = "kpi-positive" if kpis['revenue']['growth'] > 0 else "kpi-negative"
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">${kpis['revenue']['value'] / 1e6:.1f}M</div>
-            <div class="metric-label">Total Revenue</div>
-            <div class="{revenue_color}">↗ {kpis['revenue']['growth']:+.1f}%</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        profit_color = "kpi-positive" if kpis['profit']['growth'] > 0 else "kpi-negative"
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">${kpis['profit']['value'] / 1e6:.1f}M</div>
-            <div class="metric-label">Net Profit</div>
-            <div class="{profit_color}">↗ {kpis['profit']['growth']:+.1f}%</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        margin_color = "kpi-positive" if kpis['margin']['change'] > 0 else "kpi-negative"
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">{kpis['margin']['value']:.1f}%</div>
-            <div class="metric-label">Net Margin</div>
-            <div class="{margin_color}">↗ {kpis['margin']['change']:+.1f}pp</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-value">${kpis['cash']['value'] / 1e6:.1f}M</div>
-            <div class="metric-label">Cash Position</div>
-            <div class="kpi-positive">↗ {kpis['cash']['growth']:+.1f}%</div>
-        </div>
-        """, unsafe_allow_html=True)
+    revenue_color = "kpi-positive" if kpis['revenue']['growth'] > 0 else "kpi-negative"
+    profit_color = "kpi-positive" if kpis['profit']['growth'] > 0 else "kpi-negative"
+    margin_color = "kpi-positive" if kpis['margin']['change'] > 0 else "kpi-negative"
+    kpi_cards = [
+        {'prefix': '$', 'value': kpis['revenue']['value'] / 1e6, 'unit': 'M', 'label': 'Total Revenue',
+         'color': revenue_color, 'change': kpis['revenue']['growth'], 'change_unit': '%'},
+        {'prefix': '$', 'value': kpis['profit']['value'] / 1e6, 'unit': 'M', 'label': 'Net Profit',
+         'color': profit_color, 'change': kpis['profit']['growth'], 'change_unit': '%'},
+        {'prefix': '', 'value': kpis['margin']['value'], 'unit': '%', 'label': 'Net Margin',
+         'color': margin_color, 'change': kpis['margin']['change'], 'change_unit': 'pp'},
+        {'prefix': '$', 'value': kpis['cash']['value'] / 1e6, 'unit': 'M', 'label': 'Cash Position',
+         'color': 'kpi-positive', 'change': kpis['cash']['growth'], 'change_unit': '%'},
+    ]
+
+    for col, card in zip((col1, col2, col3, col4), kpi_cards):
+        with col:
+            st.markdown(_KPI_TMPL.format_map(card), unsafe_allow_html=True)
 
     # Main Analysis Section
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 Revenue Analysis", "💰 P&L Breakdown", "📊 Budget Variance", "💸 Cash Flow"])
+    # st.tabs would run every section on each rerun; a switcher runs only the selected one
+    section = st.radio(
+        "Analysis Section",
+        ["📈 Revenue Analysis", "💰 P&L Breakdown", "📊 Budget Variance", "💸 Cash Flow"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
 
-    with tab1:
+    if section == "📈 Revenue Analysis":
         st.markdown("### Revenue Growth & Profitability Trends")
         fig_revenue = create_revenue_trend_chart(df_pl.tail(24))
         st.plotly_chart(fig_revenue, use_container_width=True)
@@ -530,74 +591,63 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("#### 📊 Revenue Insights")
-            recent_growth = ((df_current['Revenue'].sum() - df_previous['Revenue'].sum()) / df_previous[
-                'Revenue'].sum()) * 100
-            avg_monthly = df_current['Revenue'].mean()
+            recent_growth = ((sums['Revenue'] - previous_sums['Revenue']) /
+                             previous_sums['Revenue']) * 100
+            avg_monthly = aggregates['avg_monthly_revenue']
             st.write(f"• **Growth Rate**: {recent_growth:+.1f}% vs previous period")
             st.write(f"• **Average Monthly**: ${avg_monthly / 1e6:.1f}M")
-            st.write(f"• **Peak Month**: {df_current.loc[df_current['Revenue'].idxmax(), 'Month_Name']}")
+            st.write(f"• **Peak Month**: {aggregates['peak_month']}")
             st.write(f"• **Revenue Run Rate**: ${avg_monthly * 12 / 1e6:.1f}M annually")
 
         with col2:
             st.markdown("#### 🎯 Profitability Metrics")
-            avg_gross_margin = df_current['Gross_Margin_%'].mean()
-            avg_net_margin = df_current['Net_Margin_%'].mean()
+            avg_gross_margin = aggregates['avg_gross_margin']
+            avg_net_margin = aggregates['avg_net_margin']
             st.write(f"• **Gross Margin**: {avg_gross_margin:.1f}%")
             st.write(f"• **Net Margin**: {avg_net_margin:.1f}%")
-            st.write(f"• **Profit per Employee**: ${(df_current['Net_Profit'].sum() / 1000) / 1e3:.0f}K (est.)")
+            st.write(f"• **Profit per Employee**: ${(sums['Net_Profit'] / 1000) / 1e3:.0f}K (est.)")
             st.write(f"• **Operating Leverage**: Strong margin expansion")
 
-    with tab2:
+    elif section == "💰 P&L Breakdown":
         st.markdown("### Profit & Loss Analysis")
-        fig_waterfall = create_pl_waterfall_chart(df_current)
+        fig_waterfall = create_pl_waterfall_chart(
+            sums['Revenue'], sums['COGS'], sums['Salaries'], sums['Marketing'], sums['R&D'],
+            sums['Operations'], sums['Other_Expenses'], sums['Net_Profit']
+        )
         st.plotly_chart(fig_waterfall, use_container_width=True)
 
         # Expense breakdown
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("#### 💡 Expense Analysis")
-            total_revenue = df_current['Revenue'].sum()
-            cogs_pct = (df_current['COGS'].sum() / total_revenue) * 100
-            salary_pct = (df_current['Salaries'].sum() / total_revenue) * 100
-            marketing_pct = (df_current['Marketing'].sum() / total_revenue) * 100
-
-            st.write(f"• **COGS**: {cogs_pct:.1f}% of revenue")
-            st.write(f"• **Salaries**: {salary_pct:.1f}% of revenue")
-            st.write(f"• **Marketing**: {marketing_pct:.1f}% of revenue")
-            st.write(f"• **R&D**: {(df_current['R&D'].sum() / total_revenue) * 100:.1f}% of revenue")
+            st.write(f"• **COGS**: {aggregates['cogs_pct']:.1f}% of revenue")
+            st.write(f"• **Salaries**: {aggregates['salaries_pct']:.1f}% of revenue")
+            st.write(f"• **Marketing**: {aggregates['marketing_pct']:.1f}% of revenue")
+            st.write(f"• **R&D**: {aggregates['rd_pct']:.1f}% of revenue")
 
         with col2:
             # Expense trend chart
-            expense_data = {
-                'Category': ['COGS', 'Salaries', 'Marketing', 'R&D', 'Operations', 'Other'],
-                'Amount': [
-                    df_current['COGS'].sum(),
-                    df_current['Salaries'].sum(),
-                    df_current['Marketing'].sum(),
-                    df_current['R&D'].sum(),
-                    df_current['Operations'].sum(),
-                    df_current['Other_Expenses'].sum()
-                ]
-            }
-
+            expense_categories = ['COGS', 'Salaries', 'Marketing', 'R&D', 'Operations', 'Other_Expenses']
             fig_expenses = px.pie(
-                values=expense_data['Amount'],
-                names=expense_data['Category'],
+                values=sums[expense_categories].values,
+                names=['COGS', 'Salaries', 'Marketing', 'R&D', 'Operations', 'Other'],
                 title="Expense Breakdown"
             )
             st.plotly_chart(fig_expenses, use_container_width=True)
 
-    with tab3:
+    elif section == "📊 Budget Variance":
         st.markdown("### Budget vs Actual Performance")
+        df_budget = _budget_frame(DATA_SEED, N_MONTHS, 7)
         fig_variance = create_budget_variance_chart(df_pl, df_budget)
         st.plotly_chart(fig_variance, use_container_width=True)
+        budget_sums = df_budget.tail(12)[['Budget_Revenue', 'Budget_Net_Profit']].sum()
 
         # Variance analysis
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("#### 📊 Revenue Variance")
-            budget_rev = df_budget.tail(12)['Budget_Revenue'].sum()
-            actual_rev = df_current['Revenue'].sum()
+            budget_rev = budget_sums['Budget_Revenue']
+            actual_rev = sums['Revenue']
             rev_variance = ((actual_rev - budget_rev) / budget_rev) * 100
 
             variance_color = "🟢" if rev_variance > 0 else "🔴"
@@ -608,8 +658,8 @@ def main():
 
         with col2:
             st.markdown("#### 💰 Profit Variance")
-            budget_profit = df_budget.tail(12)['Budget_Net_Profit'].sum()
-            actual_profit = df_current['Net_Profit'].sum()
+            budget_profit = budget_sums['Budget_Net_Profit']
+            actual_profit = sums['Net_Profit']
             profit_variance = ((actual_profit - budget_profit) / budget_profit) * 100
 
             variance_color = "🟢" if profit_variance > 0 else "🔴"
@@ -618,9 +668,10 @@ def main():
             st.write(f"• **Actual**: ${actual_profit / 1e6:.1f}M")
             st.write(f"• **Difference**: ${(actual_profit - budget_profit) / 1e6:+.1f}M")
 
-    with tab4:
+    elif section == "💸 Cash Flow":
         st.markdown("### Cash Flow Analysis")
-        df_cash_recent = df_cash_flow.tail(12)
+        df_cash_recent = _cash_flow_frame(DATA_SEED, N_MONTHS, 11).tail(12)
+        cash_sums = df_cash_recent[['Operating_Cash_Flow', 'Investing_Cash_Flow']].sum()
         fig_cash = create_cash_flow_chart(df_cash_recent)
         st.plotly_chart(fig_cash, use_container_width=True)
 
@@ -628,23 +679,23 @@ def main():
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown("#### 💵 Operating Cash Flow")
-            operating_cf = df_cash_recent['Operating_Cash_Flow'].sum()
+            operating_cf = cash_sums['Operating_Cash_Flow']
             st.metric("12-Month Total", f"${operating_cf / 1e6:.1f}M")
             st.write(f"• **Monthly Average**: ${operating_cf / 12 / 1e6:.1f}M")
-            st.write(f"• **CF Conversion**: {(operating_cf / df_current['Net_Profit'].sum()) * 100:.0f}%")
+            st.write(f"• **CF Conversion**: {(operating_cf / sums['Net_Profit']) * 100:.0f}%")
 
         with col2:
             st.markdown("#### 📈 Investing Activities")
-            investing_cf = df_cash_recent['Investing_Cash_Flow'].sum()
+            investing_cf = cash_sums['Investing_Cash_Flow']
             st.metric("12-Month Total", f"${investing_cf / 1e6:.1f}M")
             st.write(f"• **Monthly Average**: ${investing_cf / 12 / 1e6:.1f}M")
-            st.write(f"• **% of Revenue**: {(abs(investing_cf) / df_current['Revenue'].sum()) * 100:.1f}%")
+            st.write(f"• **% of Revenue**: {(abs(investing_cf) / sums['Revenue']) * 100:.1f}%")
 
         with col3:
             st.markdown("#### 🏦 Cash Position")
             current_cash = df_cash_recent['Cash_Balance'].iloc[-1]
             st.metric("Current Balance", f"${current_cash / 1e6:.1f}M")
-            st.write(f"• **Days of Expenses**: {(current_cash / (df_current['Total_Expenses'].sum() / 365)):.0f} days")
+            st.write(f"• **Days of Expenses**: {(current_cash / (sums['Total_Expenses'] / 365)):.0f} days")
             st.write(f"• **Cash Ratio**: Strong liquidity position")
 
     # Footer